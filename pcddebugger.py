@@ -5,32 +5,163 @@ import subprocess
 import os
 import json
 from datetime import datetime, timezone
-import shutil
 import re
+import threading
+import queue
+import io
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from kubernetes import client as k8s_client, config as k8s_config
+    from kubernetes.client.rest import ApiException
+except ImportError:
+    k8s_client = None
 
 KUBECONFIG = os.path.expanduser("~/.kube/config")
 DEFAULT_OUTPUT_DIR = f"debug-output-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
 OUTPUT_DIR = DEFAULT_OUTPUT_DIR
-
-def run_cmd(cmd, shell=False):
-    print(f"[RUNNING] {' '.join(cmd) if isinstance(cmd, list) else cmd}")
+VERBOSE = False
+ARCHIVE = None
+PRINT_LOCK = threading.Lock()
+CMD_CACHE = {}
+CMD_CACHE_LOCK = threading.Lock()
+CREATED_DIRS = set()
+CREATED_DIRS_LOCK = threading.Lock()
+VM_PORTS_CACHE = {}
+VM_PORTS_LOCK = threading.Lock()
+WRITE_QUEUE = queue.Queue()
+WRITE_BUFFER_SIZE = 1 << 16
+ZSTD_COMPRESS_LEVEL = 3
+STACK_RESOURCE_WORKERS = 8
+UUID_IN_PARENS_RE = re.compile(r"\(([a-f0-9\-]{36})\)")
+CONTAINER_IN_ERROR_RE = re.compile(r'container "([^"]+)"')
+MAX_CONCURRENT_CMDS = 32
+CMD_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_CMDS)
+HEALTH_CHECKS = (
+    ("compute_services", ("openstack", "compute", "service", "list")),
+    ("resource_providers", ("openstack", "resource", "provider", "list")),
+    ("network_agents", ("openstack", "network", "agent", "list")),
+    ("volume_services", ("openstack", "volume", "service", "list")),
+)
+POD_LOG_WORKERS = 16
+KUBECTL_REQUEST_TIMEOUT = "--request-timeout=30s"
+K8S_REQUEST_TIMEOUT = 30
+POD_COMPONENT_LABEL = "application"
+K8S_API = None
+
+def log(msg):
+    with PRINT_LOCK:
+        print(msg)
+
+def run_cmd(cmd):
+    if VERBOSE:
+        log(f"[RUNNING] {' '.join(cmd)}")
     try:
-        result = subprocess.run(cmd, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+        with CMD_SLOTS:
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
         return result.stdout.strip()
     except subprocess.CalledProcessError as e:
-        print(f"[ERROR] Command failed: {' '.join(cmd)}\n{e.stderr.strip()}")
+        log(f"[ERROR] Command failed: {' '.join(cmd)}\n{e.stderr.strip()}")
         return f"ERROR: {e.stderr.strip()}"
 
-def save_text(text, path):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
+def run_cmd_cached(cmd):
+    """run_cmd that runs each distinct command at most once per run."""
+    key = tuple(cmd)
+    with CMD_CACHE_LOCK:
+        fut = CMD_CACHE.get(key)
+        owner = fut is None
+        if owner:
+            fut = CMD_CACHE[key] = Future()
+    if owner:
+        try:
+            fut.set_result(run_cmd(cmd))
+        except Exception as e:
+            fut.set_exception(e)
+    return fut.result()
+
+def ensure_dir(path):
+    """os.makedirs that skips directories already created this run."""
+    with CREATED_DIRS_LOCK:
+        if path in CREATED_DIRS:
+            return
+        os.makedirs(path, exist_ok=True)
+        CREATED_DIRS.add(path)
+
+def run_cmd_to_file(cmd, path):
+    """Run cmd with stdout streamed into path; on failure the file holds the error."""
+    if VERBOSE:
+        log(f"[RUNNING] {' '.join(cmd)}")
+    ensure_dir(os.path.dirname(path))
+    with CMD_SLOTS, open(path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        result = subprocess.run(cmd, stdout=f, stderr=subprocess.PIPE)
+    if result.returncode == 0:
+        return True
+    stderr = result.stderr.decode(errors="replace").strip()
+    log(f"[ERROR] Command failed: {' '.join(cmd)}\n{stderr}")
     with open(path, "w") as f:
-        f.write(text)
+        f.write(f"ERROR: {stderr}")
+    return False
+
+def run_concurrently(calls):
+    """Run (func, *args) tuples on a thread pool and wait for all of them."""
+    with ThreadPoolExecutor(max_workers=len(calls)) as ex:
+        futures = [ex.submit(*call) for call in calls]
+        for fut in futures:
+            fut.result()
+
+def enqueue_write(text, path):
+    """Queue text for the background writer; see flush_writes()."""
+    WRITE_QUEUE.put((text, path))
+
+def write_worker():
+    while True:
+        text, path = WRITE_QUEUE.get()
+        try:
+            if ARCHIVE:
+                ARCHIVE.writestr(os.path.relpath(path, OUTPUT_DIR), text)
+            else:
+                ensure_dir(os.path.dirname(path))
+                with open(path, "w", buffering=WRITE_BUFFER_SIZE) as f:
+                    f.write(text)
+        except Exception as e:
+            # A dead writer would leave flush_writes() waiting forever.
+            log(f"[ERROR] Failed to write {path}: {e}")
+        finally:
+            WRITE_QUEUE.task_done()
+
+def start_writer():
+    threading.Thread(target=write_worker, name="output-writer", daemon=True).start()
+
+def flush_writes():
+    WRITE_QUEUE.join()
+
+def format_fields(data):
+    """Render a `-f json` show result as a two-column field/value listing."""
+    width = max((len(k) for k in data), default=0)
+    return "\n".join(
+        f"{k:<{width}}  {json.dumps(v) if isinstance(v, (dict, list)) else v}" for k, v in sorted(data.items())
+    )
 
 def extract_id(raw):
     if isinstance(raw, dict):
         return raw.get("id")
     elif isinstance(raw, str):
-        match = re.search(r"\(([a-f0-9\-]{36})\)", raw)
+        match = UUID_IN_PARENS_RE.search(raw)
         return match.group(1) if match else raw.strip()
     return None
 
@@ -52,101 +183,293 @@ def check_prerequisites(namespace):
 
     print("[OK] Prerequisites met.")
 
+def init_k8s_api():
+    """Set up one shared CoreV1Api session when the kubernetes package is installed."""
+    global K8S_API
+    if k8s_client is None:
+        print("[INFO] kubernetes Python package not installed, using kubectl for pod data.")
+        return
+    try:
+        configuration = k8s_client.Configuration()
+        k8s_config.load_kube_config(config_file=KUBECONFIG, client_configuration=configuration)
+        configuration.connection_pool_maxsize = POD_LOG_WORKERS
+        K8S_API = k8s_client.CoreV1Api(k8s_client.ApiClient(configuration))
+    except Exception as e:
+        print(f"[WARN] Could not load kubeconfig for the Python client, using kubectl: {e}")
+
 def check_openstack_auth():
     print("[INFO] Checking OpenStack authentication...")
-    test_cmd = run_cmd(["openstack", "token", "issue"])
-    if "ERROR" in test_cmd or "Missing" in test_cmd:
+    if not (os.environ.get("OS_AUTH_URL") or os.environ.get("OS_CLOUD")):
         print("[ERROR] OpenStack CLI is not authenticated. Please source your adminrc.")
         exit(1)
-    print("[OK] OpenStack authentication validated.")
+    print("[OK] OpenStack credentials found in the environment.")
 
 def collect_health_checks():
-    os.makedirs(f"{OUTPUT_DIR}/health", exist_ok=True)
-    cmds = {
-        "compute_services": ["openstack", "compute", "service", "list"],
-        "resource_providers": ["openstack", "resource", "provider", "list"],
-        "network_agents": ["openstack", "network", "agent", "list"],
-        "volume_services": ["openstack", "volume", "service", "list"],
-    }
-
-    for name, cmd in cmds.items():
-        output = run_cmd(cmd)
-        save_text(output, f"{OUTPUT_DIR}/health/{name}.txt")
-
-def collect_pod_logs(namespace, service_name_contains):
-    print(f"[INFO] Collecting logs for: {service_name_contains}")
-    pods_output = run_cmd(["kubectl", "get", "pods", "-n", namespace, "-o", "json"])
+    run_concurrently([(run_cmd_to_file, argv, f"{OUTPUT_DIR}/health/{name}.txt") for name, argv in HEALTH_CHECKS])
+
+def list_pods(namespace, label_selector=None, keep=None):
+    """Return the pods in namespace that keep() accepts (all if keep is None), or None on failure."""
+    if K8S_API:
+        if VERBOSE:
+            log(f"[RUNNING] list pods in {namespace}{f' matching {label_selector}' if label_selector else ''}")
+        try:
+            pod_list = K8S_API.list_namespaced_pod(namespace, label_selector=label_selector,
+                                                   _request_timeout=K8S_REQUEST_TIMEOUT)
+            items = K8S_API.api_client.sanitize_for_serialization(pod_list)['items']
+        except Exception as e:
+            log(f"[ERROR] Failed to list pods: {e}")
+            return None
+        return [pod for pod in items if keep is None or keep(pod)]
+
+    cmd = ["kubectl", "get", "pods", "-n", namespace, "-o", "json"]
+    if label_selector:
+        cmd += ["-l", label_selector]
+    if ijson is None:
+        pods_output = run_cmd(cmd)
+        try:
+            items = json.loads(pods_output)['items']
+        except json.JSONDecodeError:
+            log("[ERROR] Failed to parse pod JSON")
+            return None
+        return [pod for pod in items if keep is None or keep(pod)]
+
+    if VERBOSE:
+        log(f"[RUNNING] {' '.join(cmd)}")
+    pods = None
+    with CMD_SLOTS, tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err)
+        try:
+            pods = [pod for pod in ijson.items(proc.stdout, 'items.item', use_float=True)
+                    if keep is None or keep(pod)]
+        except ijson.JSONError:
+            pass
+        finally:
+            proc.stdout.close()
+            proc.wait()
+        err.seek(0)
+        stderr = err.read().decode(errors="replace").strip()
+    if proc.returncode != 0:
+        log(f"[ERROR] Command failed: {' '.join(cmd)}\n{stderr}")
+        return None
+    if pods is None:
+        log("[ERROR] Failed to parse pod JSON")
+    return pods
+
+def find_component_pods(namespace, components):
+    """Return (component, pod) pairs for the pods of components, or None if listing fails."""
+    component_pods = {comp: [] for comp in components}
+
+    def component_label(pod):
+        return (pod['metadata'].get('labels') or {}).get(POD_COMPONENT_LABEL)
+
+    pods = list_pods(namespace, f"{POD_COMPONENT_LABEL} in ({','.join(components)})",
+                     keep=lambda pod: component_label(pod) in component_pods)
+    if pods is None:
+        return None
+    for pod in pods:
+        component_pods[component_label(pod)].append(pod)
+
+    unlabelled = [comp for comp in components if not component_pods[comp]]
+    if unlabelled:
+        pods = list_pods(namespace, keep=lambda pod: any(comp in pod['metadata']['name'].lower()
+                                                         for comp in unlabelled))
+        if pods is None:
+            return None
+        for pod in pods:
+            pod_name = pod['metadata']['name'].lower()
+            for comp in unlabelled:
+                if comp in pod_name:
+                    component_pods[comp].append(pod)
+
+    matches = []
+    seen = set()
+    for comp in components:
+        for pod in component_pods[comp]:
+            pod_name = pod['metadata']['name']
+            if pod_name not in seen:
+                seen.add(pod_name)
+                matches.append((comp, pod))
+    return matches
+
+def save_pod_log(namespace, pod_name, container, out_path, previous=False):
+    """Stream one container log to out_path through the Kubernetes API."""
+    if VERBOSE:
+        log(f"[RUNNING] read log {namespace}/{pod_name}/{container}{' (previous)' if previous else ''}")
     try:
-        pods = json.loads(pods_output)
-    except json.JSONDecodeError:
-        print("[ERROR] Failed to parse pod JSON")
+        resp = K8S_API.read_namespaced_pod_log(pod_name, namespace, container=container, previous=previous,
+                                               _request_timeout=K8S_REQUEST_TIMEOUT, _preload_content=False)
+    except ApiException as e:
+        if not previous:
+            log(f"[ERROR] Failed to read log {pod_name}/{container}: {e.reason}")
+            enqueue_write(f"ERROR: {e.reason}", out_path)
+        return
+    except Exception as e:
+        log(f"[ERROR] Failed to read log {pod_name}/{container}: {e}")
+        enqueue_write(f"ERROR: {e}", out_path)
         return
 
-    matched_pods = [p for p in pods['items'] if service_name_contains in p['metadata']['name'].lower()]
-    for pod in matched_pods:
-        pod_name = pod['metadata']['name']
-        containers = [c['name'] for c in pod['spec'].get('containers', [])]
-        for container in containers:
-            log = run_cmd(["kubectl", "logs", pod_name, "-n", namespace, "-c", container])
-            save_text(log, f"{OUTPUT_DIR}/logs/{service_name_contains}_{pod_name}_{container}.log")
-
-            log_prev = run_cmd(["kubectl", "logs", pod_name, "-n", namespace, "-c", container, "--previous"])
-            if "ERROR" not in log_prev:
-                save_text(log_prev, f"{OUTPUT_DIR}/logs/{service_name_contains}_{pod_name}_{container}_previous.log")
+    try:
+        ensure_dir(os.path.dirname(out_path))
+        with open(out_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            for chunk in resp.stream(WRITE_BUFFER_SIZE):
+                f.write(chunk)
+    except Exception as e:
+        log(f"[ERROR] Failed to read log {pod_name}/{container}: {e}")
+    finally:
+        resp.release_conn()
+
+def save_pod_logs_split(namespace, pod, out_base, previous=False):
+    """Fetch every container log of a pod with one kubectl call and split it per container."""
+    pod_name = pod['metadata']['name']
+    suffix = "_previous" if previous else ""
+    cmd = ["kubectl", "logs", pod_name, "-n", namespace, "--all-containers=true", "--prefix=true",
+           "--ignore-errors=true", KUBECTL_REQUEST_TIMEOUT]
+    if previous:
+        cmd.append("--previous")
+    if VERBOSE:
+        log(f"[RUNNING] {' '.join(cmd)}")
+
+    ensure_dir(os.path.dirname(out_base))
+    files = {}
+
+    def open_log(container):
+        f = files[container] = open(f"{out_base}_{container}{suffix}.log", "wb", buffering=WRITE_BUFFER_SIZE)
+        return f
+
+    if not previous:
+        for c in pod['spec'].get('containers', []):
+            open_log(c['name'])
+
+    marker = f"[pod/{pod_name}/".encode()
+    try:
+        with CMD_SLOTS, tempfile.TemporaryFile() as err:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err)
+            for line in proc.stdout:
+                if line.startswith(marker):
+                    end = line.find(b"] ", len(marker))
+                    if end != -1:
+                        container = line[len(marker):end].decode(errors="replace")
+                        f = files.get(container) or open_log(container)
+                        f.write(line[end + 2:])
+                        continue
+                if line.startswith(b"error: ") and not previous:
+                    message = line[len(b"error: "):].decode(errors="replace").strip()
+                    log(f"[WARN] {pod_name}: {message}")
+                    m = CONTAINER_IN_ERROR_RE.search(message)
+                    container = m.group(1) if m else "errors"
+                    f = files.get(container) or open_log(container)
+                    f.write(f"ERROR: {message}\n".encode())
+            proc.wait()
+            err.seek(0)
+            stderr = err.read().decode(errors="replace").strip()
+    finally:
+        for f in files.values():
+            f.close()
+
+    if proc.returncode != 0 and not previous:
+        log(f"[ERROR] Command failed: {' '.join(cmd)}\n{stderr}")
+        for container in files:
+            with open(f"{out_base}_{container}{suffix}.log", "w") as f:
+                f.write(f"ERROR: {stderr}")
+
+def describe_pod(namespace, pod):
+    if K8S_API:
+        return json.dumps(pod, indent=2)
+    return run_cmd(["kubectl", "describe", "pod", pod['metadata']['name'], "-n", namespace, KUBECTL_REQUEST_TIMEOUT])
+
+def collect_pod_logs_multi(namespace, components):
+    if not components:
+        return
+    log(f"[INFO] Collecting logs for: {', '.join(components)}")
+    matches = find_component_pods(namespace, components)
+    if matches is None:
+        return
 
-        desc = run_cmd(["kubectl", "describe", "pod", pod_name, "-n", namespace])
-        save_text(desc, f"{OUTPUT_DIR}/describe/{service_name_contains}_{pod_name}.txt")
+    tasks = []
+    for comp, pod in matches:
+        prefix = f"{comp}_{pod['metadata']['name']}"
+        containers = [c['name'] for c in pod['spec'].get('containers', [])]
+        if K8S_API:
+            for container in containers:
+                tasks.append(("logs", namespace, pod, container, f"{OUTPUT_DIR}/logs/{prefix}_{container}.log"))
+                tasks.append(("previous", namespace, pod, container,
+                              f"{OUTPUT_DIR}/logs/{prefix}_{container}_previous.log"))
+        else:
+            tasks.append(("logs", namespace, pod, None, f"{OUTPUT_DIR}/logs/{prefix}"))
+            tasks.append(("previous", namespace, pod, None, f"{OUTPUT_DIR}/logs/{prefix}"))
+        tasks.append(("describe", namespace, pod, None, f"{OUTPUT_DIR}/describe/{prefix}.txt"))
+
+    with ThreadPoolExecutor(max_workers=POD_LOG_WORKERS) as ex:
+        list(ex.map(run_pod_task, tasks))
+
+def run_pod_task(task):
+    kind, namespace, pod, container, out_path = task
+    if kind == "describe":
+        enqueue_write(describe_pod(namespace, pod), out_path)
+    elif container is None:
+        save_pod_logs_split(namespace, pod, out_path, previous=(kind == "previous"))
+    else:
+        save_pod_log(namespace, pod['metadata']['name'], container, out_path, previous=(kind == "previous"))
 
 def collect_namespace_events(namespace):
-    events = run_cmd(["kubectl", "get", "events", "-n", namespace, "--sort-by=.lastTimestamp"])
-    save_text(events, f"{OUTPUT_DIR}/events/{namespace}_events.txt")
+    run_cmd_to_file(["kubectl", "get", "events", "-n", namespace, "--sort-by=.lastTimestamp"],
+                    f"{OUTPUT_DIR}/events/{namespace}_events.txt")
 
 def collect_nova_info(vm_id):
-    os.makedirs(f"{OUTPUT_DIR}/nova", exist_ok=True)
-
-    info_text = run_cmd(["openstack", "server", "show", vm_id])
-    save_text(info_text, f"{OUTPUT_DIR}/nova/server_show.txt")
-
-    events = run_cmd(["openstack", "server", "event", "list", vm_id])
-    save_text(events, f"{OUTPUT_DIR}/nova/server_events.txt")
-
-    migrations = run_cmd(["openstack", "server", "migration", "list", "--server", vm_id])
-    save_text(migrations, f"{OUTPUT_DIR}/nova/migrations.txt")
-
+    output = run_cmd(["openstack", "server", "show", vm_id, "-f", "json"])
     try:
-        return json.loads(run_cmd(["openstack", "server", "show", vm_id, "-f", "json"]))
+        vm_data = json.loads(output)
+        enqueue_write(format_fields(vm_data), f"{OUTPUT_DIR}/nova/server_show.txt")
     except Exception as e:
-        print(f"[WARN] Failed to parse VM details: {e}")
-        return {}
+        log(f"[WARN] Failed to parse VM details: {e}")
+        enqueue_write(output, f"{OUTPUT_DIR}/nova/server_show.txt")
+        vm_data = {}
+
+    run_cmd_to_file(["openstack", "server", "event", "list", vm_id], f"{OUTPUT_DIR}/nova/server_events.txt")
+
+    run_cmd_to_file(["openstack", "server", "migration", "list", "--server", vm_id],
+                    f"{OUTPUT_DIR}/nova/migrations.txt")
+
+    return vm_data
+
+def get_vm_ports(vm_id):
+    """Return the VM's ports from `port list -f json`, fetched once per run."""
+    with VM_PORTS_LOCK:
+        if vm_id not in VM_PORTS_CACHE:
+            output = run_cmd(["openstack", "port", "list", "--device-id", vm_id, "-f", "json"])
+            try:
+                ports = json.loads(output)
+                enqueue_write(json.dumps(ports, indent=2), f"{OUTPUT_DIR}/neutron/vm_ports.txt")
+            except json.JSONDecodeError:
+                log(f"[WARN] Failed to list ports for VM {vm_id}")
+                enqueue_write(output, f"{OUTPUT_DIR}/neutron/vm_ports.txt")
+                ports = []
+            VM_PORTS_CACHE[vm_id] = ports
+        return VM_PORTS_CACHE[vm_id]
 
 def collect_ports_for_vm(vm_id):
-    os.makedirs(f"{OUTPUT_DIR}/neutron", exist_ok=True)
-    ports_raw = run_cmd(["openstack", "port", "list", "--device-id", vm_id])
-    save_text(ports_raw, f"{OUTPUT_DIR}/neutron/vm_ports.txt")
-
+    seen_networks = set()
     try:
-        ports = json.loads(run_cmd(["openstack", "port", "list", "--device-id", vm_id, "-f", "json"]))
-        for port in ports:
+        for port in get_vm_ports(vm_id):
             port_id = port.get("ID")
             if port_id:
                 port_detail = run_cmd(["openstack", "port", "show", port_id])
-                save_text(port_detail, f"{OUTPUT_DIR}/neutron/port_{port_id}.txt")
+                enqueue_write(port_detail, f"{OUTPUT_DIR}/neutron/port_{port_id}.txt")
 
             network_id = port.get("Network ID")
-            if network_id:
-                net_detail = run_cmd(["openstack", "network", "show", network_id])
-                save_text(net_detail, f"{OUTPUT_DIR}/neutron/network_{network_id}.txt")
+            if network_id and network_id not in seen_networks:
+                seen_networks.add(network_id)
+                net_detail = run_cmd_cached(["openstack", "network", "show", network_id])
+                enqueue_write(net_detail, f"{OUTPUT_DIR}/neutron/network_{network_id}.txt")
 
     except Exception as e:
-        print(f"[WARN] Failed to process VM ports or networks: {e}")
+        log(f"[WARN] Failed to process VM ports or networks: {e}")
 
 def collect_security_groups_for_vm(vm_id):
-    os.makedirs(f"{OUTPUT_DIR}/neutron", exist_ok=True)
     try:
-        ports = json.loads(run_cmd(["openstack", "port", "list", "--device-id", vm_id, "-f", "json"]))
         sg_ids = set()
 
-        for port in ports:
+        for port in get_vm_ports(vm_id):
             sgs = port.get("Security Group") or port.get("Security Groups")
             if isinstance(sgs, list):
                 sg_ids.update(sgs)
@@ -154,76 +477,132 @@ def collect_security_groups_for_vm(vm_id):
                 sg_ids.update(json.loads(sgs))
 
         for sg_id in sg_ids:
-            print(f"[INFO] Fetching security group: {sg_id}")
-            sg_detail = run_cmd(["openstack", "security", "group", "show", sg_id])
-            sg_rules = run_cmd(["openstack", "security", "group", "rule", "list", sg_id])
-            save_text(sg_detail, f"{OUTPUT_DIR}/neutron/security_group_{sg_id}.txt")
-            save_text(sg_rules, f"{OUTPUT_DIR}/neutron/security_group_{sg_id}_rules.txt")
+            log(f"[INFO] Fetching security group: {sg_id}")
+            sg_detail = run_cmd_cached(["openstack", "security", "group", "show", sg_id])
+            enqueue_write(sg_detail, f"{OUTPUT_DIR}/neutron/security_group_{sg_id}.txt")
+            run_cmd_to_file(["openstack", "security", "group", "rule", "list", sg_id],
+                            f"{OUTPUT_DIR}/neutron/security_group_{sg_id}_rules.txt")
 
     except Exception as e:
-        print(f"[WARN] Failed to collect security group info: {e}")
+        log(f"[WARN] Failed to collect security group info: {e}")
 
-def collect_volumes_for_vm(vm_id):
-    os.makedirs(f"{OUTPUT_DIR}/cinder", exist_ok=True)
+def collect_volumes_for_vm(vm_data):
     try:
-        vm_json = json.loads(run_cmd(["openstack", "server", "show", vm_id, "-f", "json"]))
-        attached_vols = vm_json.get("os-extended-volumes:volumes_attached", [])
-        save_text(json.dumps(attached_vols, indent=2), f"{OUTPUT_DIR}/cinder/attached_volumes.txt")
+        attached_vols = vm_data.get("os-extended-volumes:volumes_attached", [])
+        enqueue_write(json.dumps(attached_vols, indent=2), f"{OUTPUT_DIR}/cinder/attached_volumes.txt")
 
         for vol in attached_vols:
             vol_id = vol.get("id")
             if vol_id:
                 vol_detail = run_cmd(["openstack", "volume", "show", vol_id])
-                save_text(vol_detail, f"{OUTPUT_DIR}/cinder/volume_{vol_id}.txt")
+                enqueue_write(vol_detail, f"{OUTPUT_DIR}/cinder/volume_{vol_id}.txt")
 
     except Exception as e:
-        print(f"[WARN] Failed to collect volumes for VM: {e}")
+        log(f"[WARN] Failed to collect volumes for VM: {e}")
 
 def collect_stack_info(stack_id):
-    os.makedirs(f"{OUTPUT_DIR}/heat", exist_ok=True)
-
     stack_show = run_cmd(["openstack", "stack", "show", stack_id])
-    save_text(stack_show, f"{OUTPUT_DIR}/heat/stack_show.txt")
+    enqueue_write(stack_show, f"{OUTPUT_DIR}/heat/stack_show.txt")
 
-    resource_list_raw = run_cmd(["openstack", "stack", "resource", "list", stack_id])
-    save_text(resource_list_raw, f"{OUTPUT_DIR}/heat/stack_resources.txt")
+    run_cmd_to_file(["openstack", "stack", "resource", "list", stack_id], f"{OUTPUT_DIR}/heat/stack_resources.txt")
 
     try:
-        resources = json.loads(run_cmd(["openstack", "stack", "resource", "list", stack_id, "-f", "json"]))
-        for res in resources:
-            res_name = res.get("resource_name")
-            if res_name:
-                res_show = run_cmd(["openstack", "stack", "resource", "show", stack_id, res_name])
-                save_text(res_show, f"{OUTPUT_DIR}/heat/resource_{res_name}.txt")
+        resources = json.loads(run_cmd(["openstack", "stack", "resource", "list", stack_id,
+                                         "-c", "resource_name", "-f", "json"]))
+        res_names = [res["resource_name"] for res in resources if res.get("resource_name")]
+        show_cmds = [["openstack", "stack", "resource", "show", stack_id, res_name] for res_name in res_names]
+        with ThreadPoolExecutor(max_workers=STACK_RESOURCE_WORKERS) as ex:
+            for res_name, res_show in zip(res_names, ex.map(run_cmd, show_cmds)):
+                enqueue_write(res_show, f"{OUTPUT_DIR}/heat/resource_{res_name}.txt")
     except Exception as e:
-        print(f"[WARN] Could not parse Heat resource list: {e}")
+        log(f"[WARN] Could not parse Heat resource list: {e}")
 
 def collect_image_and_flavor(vm_data):
     image_id = extract_id(vm_data.get("image"))
     flavor_id = extract_id(vm_data.get("flavor"))
-    print(f"[DEBUG] image_id = {image_id}, flavor_id = {flavor_id}")
+    log(f"[DEBUG] image_id = {image_id}, flavor_id = {flavor_id}")
 
     if image_id:
         image = run_cmd(["openstack", "image", "show", image_id])
-        save_text(image, f"{OUTPUT_DIR}/glance/image_show.txt")
+        enqueue_write(image, f"{OUTPUT_DIR}/glance/image_show.txt")
     if flavor_id:
         flavor = run_cmd(["openstack", "flavor", "show", flavor_id])
-        save_text(flavor, f"{OUTPUT_DIR}/nova/flavor_show.txt")
+        enqueue_write(flavor, f"{OUTPUT_DIR}/nova/flavor_show.txt")
+
+def collect_server_details(vm_id):
+    vm_data = collect_nova_info(vm_id)
+    run_concurrently([(collect_image_and_flavor, vm_data), (collect_volumes_for_vm, vm_data)])
+
+def collect_vm_info(vm_id):
+    run_concurrently([
+        (collect_server_details, vm_id),
+        (collect_ports_for_vm, vm_id),
+        (collect_security_groups_for_vm, vm_id),
+    ])
 
 def collect_keystone_user_info(user_id_or_name):
-    os.makedirs(f"{OUTPUT_DIR}/keystone", exist_ok=True)
     user_info = run_cmd(["openstack", "user", "show", user_id_or_name])
-    save_text(user_info, f"{OUTPUT_DIR}/keystone/user_show.txt")
-
-    role_assignments = run_cmd(["openstack", "role", "assignment", "list", "--user", user_id_or_name, "--names"])
-    save_text(role_assignments, f"{OUTPUT_DIR}/keystone/user_role_assignments.txt")
+    enqueue_write(user_info, f"{OUTPUT_DIR}/keystone/user_show.txt")
+
+    run_cmd_to_file(["openstack", "role", "assignment", "list", "--user", user_id_or_name, "--names"],
+                    f"{OUTPUT_DIR}/keystone/user_role_assignments.txt")
+
+class TarZstArchive:
+    """Write-only .tar.zst archive exposing the subset of ZipFile used by this tool."""
+
+    def __init__(self, filename, root):
+        self.filename = filename
+        self.root = root
+        compressor = zstandard.ZstdCompressor(level=ZSTD_COMPRESS_LEVEL, threads=-1)
+        self._stream = compressor.stream_writer(open(filename, "wb"))
+        self._tar = tarfile.open(fileobj=self._stream, mode="w|")
+
+    def writestr(self, arcname, text):
+        data = text.encode()
+        info = tarfile.TarInfo(f"{self.root}/{arcname}")
+        info.size = len(data)
+        info.mtime = time.time()
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def write(self, path, arcname):
+        self._tar.add(path, arcname=f"{self.root}/{arcname}")
+
+    def close(self):
+        self._tar.close()
+        self._stream.close()
+
+def open_archive(output, zstd=False):
+    """Write output into <output>.zip or .tar.zst, staging streamed files in a temp dir."""
+    global OUTPUT_DIR, ARCHIVE
+    parent = os.path.dirname(os.path.abspath(output))
+    os.makedirs(parent, exist_ok=True)
+    OUTPUT_DIR = tempfile.mkdtemp(prefix=f".{os.path.basename(output)}-", dir=parent)
+    if zstd:
+        ARCHIVE = TarZstArchive(f"{output}.tar.zst", os.path.basename(os.path.abspath(output)))
+    else:
+        ARCHIVE = zipfile.ZipFile(f"{output}.zip", "w", zipfile.ZIP_DEFLATED)
 
 def archive_output():
-    zip_path = shutil.make_archive(OUTPUT_DIR, 'zip', OUTPUT_DIR)
-    print(f"[DONE] Output archived at: {zip_path}")
+    paths = [os.path.join(root, name) for root, _, files in os.walk(OUTPUT_DIR) for name in sorted(files)]
+    for path in paths:
+        ARCHIVE.write(path, os.path.relpath(path, OUTPUT_DIR))
+    ARCHIVE.close()
+    shutil.rmtree(OUTPUT_DIR)
+    print(f"[DONE] Output archived at: {ARCHIVE.filename}")
+
+def discard_archive():
+    """Remove the partial archive and its staging directory after a failed run."""
+    try:
+        ARCHIVE.close()
+    except Exception:
+        pass
+    if os.path.exists(ARCHIVE.filename):
+        os.remove(ARCHIVE.filename)
+    shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
 
 def main():
-    global OUTPUT_DIR
+    global OUTPUT_DIR, VERBOSE
     parser = argparse.ArgumentParser(description="OpenStack Pod Debug Tool")
     parser.add_argument("--namespace", required=True, help="Kubernetes namespace")
     parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Output directory")
@@ -231,51 +610,71 @@ def main():
     parser.add_argument("--network", help="Network ID")
     parser.add_argument("--port", help="Port ID")
     parser.add_argument("--volume", help="Volume ID")
-    parser.add_argument("--zip", action="store_true", help="Zip output")
+    parser.add_argument("--zip", action="store_true", help="Write output to <output>.zip instead of a directory")
+    parser.add_argument("--zstd", action="store_true",
+                        help="Write output to <output>.tar.zst instead of a directory (needs the zstandard package)")
     parser.add_argument("--stack", help="Heat Stack ID")
     parser.add_argument("--user", help="Keystone User ID or Name")
+    parser.add_argument("--verbose", action="store_true", help="Print each command as it runs")
 
     args = parser.parse_args()
-    OUTPUT_DIR = args.output
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    VERBOSE = args.verbose
+    if args.zip and args.zstd:
+        parser.error("--zip and --zstd cannot be combined")
+    if args.zstd and zstandard is None:
+        parser.error("--zstd needs the zstandard package (pip install zstandard)")
+
+    if not (args.zip or args.zstd):
+        OUTPUT_DIR = args.output
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
 
     check_prerequisites(args.namespace)
+    init_k8s_api()
     check_openstack_auth()
-    collect_health_checks()
-    collect_namespace_events(args.namespace)
-
-    vm_data = {}
-    if args.vm:
-        vm_data = collect_nova_info(args.vm)
-        collect_image_and_flavor(vm_data)
-        collect_ports_for_vm(args.vm)
-        collect_volumes_for_vm(args.vm)
-        collect_security_groups_for_vm(args.vm)
-        for comp in ["nova", "glance", "image", "keystone", "neutron", "cinder"]:
-            collect_pod_logs(args.namespace, comp)
-
-    if args.network:
-        collect_pod_logs(args.namespace, "neutron")
-
-    if args.port:
-        collect_pod_logs(args.namespace, "neutron")
 
-    if args.volume:
-        collect_pod_logs(args.namespace, "cinder")
+    if args.zip or args.zstd:
+        open_archive(args.output, zstd=args.zstd)
+    start_writer()
 
-    if args.stack:
-        collect_stack_info(args.stack)
-        collect_pod_logs(args.namespace, "heat")
-
-    if args.user:
-        collect_keystone_user_info(args.user)
-        collect_pod_logs(args.namespace, "keystone")
-
-    summary = f"""Debug Summary - {datetime.now(timezone.utc).isoformat()} UTC\nNamespace: {args.namespace}"""
-    save_text(summary, f"{OUTPUT_DIR}/summary.txt")
-
-    if args.zip:
-        archive_output()
+    try:
+        try:
+            jobs = [(collect_health_checks,), (collect_namespace_events, args.namespace)]
+            components = []
+            if args.vm:
+                jobs.append((collect_vm_info, args.vm))
+                components += ["nova", "glance", "image", "keystone", "neutron", "cinder"]
+
+            if args.network:
+                components.append("neutron")
+
+            if args.port:
+                components.append("neutron")
+
+            if args.volume:
+                components.append("cinder")
+
+            if args.stack:
+                jobs.append((collect_stack_info, args.stack))
+                components.append("heat")
+
+            if args.user:
+                jobs.append((collect_keystone_user_info, args.user))
+                components.append("keystone")
+
+            jobs.append((collect_pod_logs_multi, args.namespace, list(dict.fromkeys(components))))
+            run_concurrently(jobs)
+
+            summary = f"""Debug Summary - {datetime.now(timezone.utc).isoformat()} UTC\nNamespace: {args.namespace}"""
+            enqueue_write(summary, f"{OUTPUT_DIR}/summary.txt")
+        finally:
+            flush_writes()
+
+        if ARCHIVE:
+            archive_output()
+    except BaseException:
+        if ARCHIVE:
+            discard_archive()
+        raise
 
 if __name__ == "__main__":
     main()